@@ -5,23 +5,72 @@ Modern, professional website replacing Gradio template
 import os
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from pypdf import PdfReader
 import re
 import json
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
+from interaction_log import interaction_logger, normalize_text, text_digest, usage_fields
+from sessions import session_store
+from conversation_export import EXPORT_FORMATS
+from prefetch import PrefetchManager
 
 # Load API Key
 load_dotenv()
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Async client for background prefetch so cancelled requests are actually aborted
+async_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+async def prefetch_completion(messages):
+    """Generate one speculative answer for a suggestion chip"""
+    started = time.perf_counter()
+    response = await async_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.7
+    )
+    # No question field: speculative suggestions must not count as visitor demand
+    interaction_logger.record(
+        "/api/prefetch",
+        (time.perf_counter() - started) * 1000,
+        **usage_fields(response.usage)
+    )
+    return response.choices[0].message.content, response.usage
+
+# The follow-up chips the browser may show (keep in sync with COMMON_QUESTIONS
+# in static/script.js); nothing else is prefetched, so clients can't spend tokens
+# on arbitrary prompts
+FOLLOW_UP_QUESTIONS = [
+    "What is your experience with Django?",
+    "Tell me about your AI projects.",
+    "Where did you study?",
+    "How would you approach building a scalable API?",
+    "What are your strongest technical skills?",
+    "Tell me about your work experience.",
+    "What programming languages do you know?",
+    "Describe your Python projects.",
+    "What is your experience with machine learning?",
+    "Tell me about your education background.",
+]
+
+prefetcher = PrefetchManager(prefetch_completion, allowed=FOLLOW_UP_QUESTIONS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    interaction_logger.start()
+    yield
+    prefetcher.shutdown()
+    interaction_logger.stop()
 
 # Initialize FastAPI
-app = FastAPI(title="Rajath's AI Avatar")
+app = FastAPI(title="Rajath's AI Avatar", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -127,6 +176,10 @@ class ChatMessage(BaseModel):
     history: List[dict] = []
     visitor_name: str = "Guest"
     visitor_company: str = "Unknown"
+    session_id: Optional[str] = None
+    # Client-side ids of this turn, stored with the session for export matching
+    message_id: Optional[str] = None
+    response_id: Optional[str] = None
 
 class CompanyFitRequest(BaseModel):
     company_name: str
@@ -136,6 +189,26 @@ class JobAnalysisRequest(BaseModel):
     job_description: str
     company_name: str = "Unknown"
 
+class ExportMessage(BaseModel):
+    role: str
+    content: str = ""
+
+class ExportRequest(BaseModel):
+    history: List[ExportMessage] = []
+    session_id: Optional[str] = None
+    # Ids of the messages the client expects the stored session to hold, in order
+    message_ids: Optional[List[str]] = None
+    visitor_name: str = "Guest"
+    format: Literal["pdf", "txt", "md"] = "pdf"
+
+class PrefetchRequest(BaseModel):
+    session_id: str
+    suggestions: List[str] = []
+    # Same client-side history a chip click will send to /api/chat
+    history: List[dict] = []
+    visitor_name: str = "Guest"
+    visitor_company: str = "Unknown"
+
 # Helper functions
 def create_system_prompt(visitor_name: str, visitor_company: str) -> str:
     company_context = ""
@@ -165,6 +238,27 @@ RULES:
 {company_context}
 """
 
+def prior_history(history: List[dict], message: str) -> List[dict]:
+    """Client history without the message being sent (the browser appends it before posting)"""
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == message:
+        return history[:-1]
+    return history
+
+def build_chat_messages(visitor_name: str, visitor_company: str, history: List[dict], message: str) -> List[dict]:
+    messages = [{"role": "system", "content": create_system_prompt(visitor_name, visitor_company)}]
+    for msg in history:
+        if msg.get("role") in ("user", "assistant"):
+            messages.append({"role": msg["role"], "content": msg["content"]})
+    messages.append({"role": "user", "content": message})
+    return messages
+
+def record_chat_turn(request: ChatMessage, answer: str):
+    if request.session_id:
+        session_store.append(request.session_id, "user", request.message,
+                             request.visitor_name, request.visitor_company, request.message_id)
+        session_store.append(request.session_id, "assistant", answer,
+                             request.visitor_name, request.visitor_company, request.response_id)
+
 # API Routes
 @app.get("/")
 async def read_root():
@@ -172,68 +266,142 @@ async def read_root():
 
 @app.post("/api/chat")
 async def chat(request: ChatMessage):
+    started = time.perf_counter()
     try:
-        system_prompt = create_system_prompt(request.visitor_name, request.visitor_company)
-        messages = [{"role": "system", "content": system_prompt}]
+        history = prior_history(request.history, request.message)
         
-        # Add history
-        for msg in request.history:
-            if msg.get("role") == "user":
-                messages.append({"role": "user", "content": msg["content"]})
-            elif msg.get("role") == "assistant":
-                messages.append({"role": "assistant", "content": msg["content"]})
+        # A clicked suggestion chip may already have been answered in the background
+        if request.session_id:
+            prefetched = await prefetcher.claim(request.session_id, request.message, len(history))
+            if prefetched:
+                answer, _ = prefetched
+                
+                def replay():
+                    try:
+                        yield f"data: {json.dumps({'chunk': answer, 'done': False})}\n\n"
+                        record_chat_turn(request, answer)
+                        yield f"data: {json.dumps({'chunk': '', 'done': True, 'full_response': answer})}\n\n"
+                    finally:
+                        interaction_logger.record(
+                            "/api/chat",
+                            (time.perf_counter() - started) * 1000,
+                            question=normalize_text(request.message),
+                            company=normalize_text(request.visitor_company),
+                            history_len=len(request.history),
+                            **usage_fields(None),
+                            prefetch_hit=True,
+                            status=200
+                        )
+                
+                return StreamingResponse(replay(), media_type="text/event-stream")
         
-        messages.append({"role": "user", "content": request.message})
+        messages = build_chat_messages(request.visitor_name, request.visitor_company,
+                                       history, request.message)
         
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             temperature=0.7,
-            stream=True
+            stream=True,
+            stream_options={"include_usage": True}
         )
         
         # Stream response for typing effect
         def generate():
             full_response = ""
+            usage = None
+            log = {"status": 200}
             try:
                 for chunk in response:
+                    if chunk.usage:
+                        usage = chunk.usage
                     if chunk.choices and len(chunk.choices) > 0:
                         delta = chunk.choices[0].delta
                         if hasattr(delta, 'content') and delta.content:
                             content = delta.content
                             full_response += content
                             yield f"data: {json.dumps({'chunk': content, 'done': False})}\n\n"
+                record_chat_turn(request, full_response)
                 yield f"data: {json.dumps({'chunk': '', 'done': True, 'full_response': full_response})}\n\n"
             except Exception as e:
+                log["error"] = type(e).__name__
                 # Fallback: return full response if streaming fails
                 yield f"data: {json.dumps({'chunk': '', 'done': True, 'full_response': full_response or 'Error: Could not generate response.'})}\n\n"
+            finally:
+                interaction_logger.record(
+                    "/api/chat",
+                    (time.perf_counter() - started) * 1000,
+                    question=normalize_text(request.message),
+                    company=normalize_text(request.visitor_company),
+                    history_len=len(request.history),
+                    **usage_fields(usage),
+                    **log
+                )
         
         return StreamingResponse(generate(), media_type="text/event-stream")
     except Exception as e:
+        interaction_logger.record(
+            "/api/chat",
+            (time.perf_counter() - started) * 1000,
+            question=normalize_text(request.message),
+            company=normalize_text(request.visitor_company),
+            status=500,
+            error=type(e).__name__
+        )
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/prefetch")
+async def prefetch_suggestions(request: PrefetchRequest):
+    """Speculatively answer the suggestion chips currently shown to the visitor"""
+    # Built exactly like the cold /api/chat prompt so a replayed answer saw the same context
+    prompts = {
+        suggestion: build_chat_messages(request.visitor_name, request.visitor_company,
+                                        request.history, suggestion)
+        for suggestion in request.suggestions[:prefetcher.max_suggestions]
+    }
+    scheduled = prefetcher.schedule(request.session_id, len(request.history), prompts)
+    return JSONResponse({"scheduled": scheduled})
+
+@app.get("/api/prefetch/stats")
+async def prefetch_stats():
+    """Prefetch hit rate and wasted tokens, for tuning"""
+    return JSONResponse(prefetcher.stats())
+
 @app.get("/api/stats")
 async def get_stats():
     """Get quick stats extracted from resume"""
+    started = time.perf_counter()
+    log = {"status": 200}
     try:
         stats = extract_stats_from_resume()
         return JSONResponse(stats)
     except Exception as e:
+        log.update(status=500, error=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        interaction_logger.record("/api/stats", (time.perf_counter() - started) * 1000, **log)
 
 @app.get("/api/projects")
 async def get_projects():
     """Get projects extracted from resume"""
+    started = time.perf_counter()
+    log = {"status": 200}
     try:
         projects = extract_projects_from_resume()
         return JSONResponse({"projects": projects})
     except Exception as e:
+        log.update(status=500, error=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        interaction_logger.record("/api/projects", (time.perf_counter() - started) * 1000, **log)
 
 @app.post("/api/analyze-company-fit")
 async def analyze_company_fit(request: CompanyFitRequest):
+    started = time.perf_counter()
+    log = {"status": 200, "company": normalize_text(request.company_name)}
     try:
         if not request.company_name or request.company_name.lower() == "unknown":
+            log["error"] = "missing_company_name"
             return JSONResponse({"analysis": "Please enter your company name to see a personalized analysis."})
         
         prompt = f"""Analyze why {NAME} would be an excellent fit for {request.company_name}. 
@@ -253,17 +421,29 @@ Be specific, professional, and concise. Format with bullet points."""
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7
         )
+        log.update(usage_fields(response.usage))
         
         return JSONResponse({
             "analysis": response.choices[0].message.content
         })
     except Exception as e:
+        log.update(status=500, error=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        interaction_logger.record("/api/analyze-company-fit", (time.perf_counter() - started) * 1000, **log)
 
 @app.post("/api/analyze-job")
 async def analyze_job(request: JobAnalysisRequest):
+    started = time.perf_counter()
+    log = {
+        "status": 200,
+        "company": normalize_text(request.company_name),
+        "jd_hash": text_digest(request.job_description),
+        "jd_chars": len(request.job_description or ""),
+    }
     try:
         if not request.job_description or request.job_description.strip() == "":
+            log["error"] = "empty_job_description"
             return JSONResponse({"analysis": "⚠️ Please paste a job description to analyze."})
         
         prompt = f"""You are analyzing how well {NAME} matches this job description for {request.company_name}.
@@ -287,52 +467,79 @@ Be honest, specific, and actionable. Format clearly with sections."""
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7
         )
+        log.update(usage_fields(response.usage))
         
         return JSONResponse({
             "analysis": response.choices[0].message.content
         })
     except Exception as e:
+        log.update(status=500, error=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        interaction_logger.record("/api/analyze-job", (time.perf_counter() - started) * 1000, **log)
 
+@app.post("/api/export-chat")
 @app.post("/api/export-chat-pdf")
-async def export_chat_pdf(request: dict):
-    """Export chat conversation as PDF"""
-    try:
-        chat_history = request.get("history", [])
-        visitor_name = request.get("visitor_name", "Guest")
-        
-        # Create simple text-based PDF content
-        pdf_content = f"""
-Rajath's AI Avatar - Conversation Export
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Visitor: {visitor_name}
-{'='*60}
-
-"""
-        
-        for msg in chat_history:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")
-            if role == "user":
-                pdf_content += f"\n[You]: {content}\n"
-            elif role == "assistant":
-                pdf_content += f"\n[Rajath's AI Avatar]: {content}\n"
-            pdf_content += "-" * 60 + "\n"
-        
-        # Return as text file (simple approach without external PDF library)
-        return Response(
-            content=pdf_content,
-            media_type="text/plain",
-            headers={
-                "Content-Disposition": f'attachment; filename="conversation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt"'
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def export_chat(request: ExportRequest):
+    """Stream the conversation as PDF, text or markdown from a stored session or the posted history"""
+    started = time.perf_counter()
+    visitor_name = request.visitor_name
+    if request.session_id:
+        session = session_store.snapshot(request.session_id)
+        if session is None:
+            interaction_logger.record(
+                "/api/export-chat",
+                (time.perf_counter() - started) * 1000,
+                format=request.format,
+                status=404,
+                error="session_not_found"
+            )
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+        # Lost, truncated or locally deleted messages all show up as a different id list
+        if request.message_ids is not None and [m.get("id") for m in session.messages] != request.message_ids:
+            interaction_logger.record(
+                "/api/export-chat",
+                (time.perf_counter() - started) * 1000,
+                format=request.format,
+                status=409,
+                error="session_mismatch"
+            )
+            raise HTTPException(status_code=409, detail="Stored session does not match the client's messages")
+        messages = session.messages
+        omitted = session.omitted
+        if visitor_name == "Guest":
+            visitor_name = session.visitor_name
+    else:
+        messages = [m.model_dump() for m in request.history]
+        omitted = 0
+    
+    media_type, exporter = EXPORT_FORMATS[request.format]
+    filename = f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{request.format}"
+    
+    def generate():
+        try:
+            yield from exporter(messages, visitor_name, omitted=omitted)
+        finally:
+            interaction_logger.record(
+                "/api/export-chat",
+                (time.perf_counter() - started) * 1000,
+                history_len=len(messages),
+                omitted=omitted,
+                format=request.format,
+                status=200
+            )
+    
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @app.get("/api/download-resume")
 async def download_resume():
     """Download Rajath's resume PDF"""
+    started = time.perf_counter()
+    log = {"status": 200}
     try:
         resume_path = "files/rajath.pdf"
         if os.path.exists(resume_path):
@@ -344,7 +551,10 @@ async def download_resume():
         else:
             raise HTTPException(status_code=404, detail="Resume file not found")
     except Exception as e:
+        log.update(status=500, error=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        interaction_logger.record("/api/download-resume", (time.perf_counter() - started) * 1000, **log)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -0,0 +1,63 @@
+"""
+Benchmark conversation export on very long transcripts.
+
+Streams each format into a byte counter (nothing is kept) and reports
+throughput and peak traced memory, which should stay roughly flat as the
+number of messages grows:
+
+    python benchmarks/export_benchmark.py --messages 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_export import EXPORT_FORMATS  # noqa: E402
+
+ANSWER = (
+    "I built a Django REST API that served machine learning predictions, "
+    "with Celery workers for batch scoring and Redis for caching. "
+) * 8
+
+
+def transcript(count):
+    """Generate messages lazily so the input itself does not dominate memory"""
+    for i in range(count):
+        if i % 2 == 0:
+            yield {"role": "user", "content": f"Question {i}: tell me about your Python experience?"}
+        else:
+            yield {"role": "assistant", "content": ANSWER}
+
+
+def run(fmt, count):
+    _, exporter = EXPORT_FORMATS[fmt]
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in exporter(transcript(count), "Benchmark"):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    args = parser.parse_args()
+
+    print(f"{'format':<6} {'messages':>9} {'output MB':>10} {'seconds':>8} {'MB/s':>7} {'peak KB':>8}")
+    for fmt in args.formats:
+        for count in args.messages:
+            elapsed, size, peak = run(fmt, count)
+            mb = size / 1e6
+            print(f"{fmt:<6} {count:>9} {mb:>10.1f} {elapsed:>8.2f} {mb / elapsed:>7.1f} {peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
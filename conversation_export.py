@@ -0,0 +1,253 @@
+"""
+Streaming conversation export for Rajath's AI Avatar.
+
+Each exporter is a generator that yields the document a piece at a time
+(one message for text/markdown, one page for PDF), so a ``StreamingResponse``
+can send it without ever holding the whole transcript in memory. The PDF
+writer emits plain PDF 1.4 with the built-in Helvetica fonts, which keeps
+the export free of extra dependencies.
+"""
+import re
+import unicodedata
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+NAME = "Rajath"
+TITLE = f"{NAME}'s AI Avatar - Conversation Export"
+ROLE_LABELS = {"user": "You", "assistant": f"{NAME}'s AI Avatar"}
+
+# PDF page geometry (US Letter, points)
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 54
+FONT_SIZE = 10
+LEADING = 14
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+# Fixed object numbers; page objects are allocated from FIRST_PAGE_OBJ upwards
+CATALOG_OBJ, PAGES_OBJ, FONT_OBJ, BOLD_FONT_OBJ, FIRST_PAGE_OBJ = 1, 2, 3, 4, 5
+
+
+def _omitted_note(omitted: int) -> str:
+    return f"Note: {omitted} earlier messages were omitted from this export."
+
+
+def _messages(history: Iterable[Dict[str, str]]) -> Iterator[Tuple[str, str]]:
+    for msg in history:
+        role = msg.get("role")
+        if role in ROLE_LABELS:
+            yield ROLE_LABELS[role], msg.get("content", "")
+
+
+def iter_text(history: Iterable[Dict[str, str]], visitor_name: str = "Guest",
+              generated: datetime = None, omitted: int = 0) -> Iterator[str]:
+    generated = generated or datetime.now()
+    note = f"{_omitted_note(omitted)}\n" if omitted else ""
+    yield (f"{TITLE}\nGenerated: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n"
+           f"Visitor: {visitor_name}\n{note}{'=' * 60}\n\n")
+    for label, content in _messages(history):
+        yield f"[{label}]: {content}\n{'-' * 60}\n"
+
+
+def iter_markdown(history: Iterable[Dict[str, str]], visitor_name: str = "Guest",
+                  generated: datetime = None, omitted: int = 0) -> Iterator[str]:
+    generated = generated or datetime.now()
+    note = f"\n> {_omitted_note(omitted)}\n" if omitted else ""
+    yield (f"# {TITLE}\n\n**Generated:** {generated.strftime('%Y-%m-%d %H:%M:%S')}\n"
+           f"**Visitor:** {visitor_name}\n{note}\n---\n\n")
+    for label, content in _messages(history):
+        yield f"**{label}**:\n\n{content}\n\n---\n\n"
+
+
+# --- PDF ---
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the standard AFM
+_HELVETICA_WIDTHS = dict(zip(
+    (chr(c) for c in range(32, 127)),
+    (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+     556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+     1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+     667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+     333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+     556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584),
+))
+_WIDEST = 1000  # assumed for accented and other non-ASCII cp1252 glyphs
+
+
+def _pdf_text(text: str) -> str:
+    """Reduce text to what WinAnsiEncoding can show: transliterate accents, drop emoji"""
+    text = text.replace("\t", "    ")
+    try:
+        text.encode("cp1252")
+        return text
+    except UnicodeEncodeError:
+        pass
+    kept = []
+    for char in text:
+        try:
+            char.encode("cp1252")
+            kept.append(char)
+        except UnicodeEncodeError:
+            base = unicodedata.normalize("NFKD", char).encode("cp1252", errors="ignore").decode("cp1252")
+            kept.append(base)
+    # Dropped symbols usually leave a doubled space behind
+    return re.sub(r"(?<=\S) {2,}(?=\S)", " ", "".join(kept)).strip(" ") if kept else ""
+
+
+@lru_cache(maxsize=1024)
+def _text_width(text: str) -> float:
+    return sum(_HELVETICA_WIDTHS.get(c, _WIDEST) for c in text) * FONT_SIZE / 1000
+
+
+def _wrap(paragraph: str) -> List[str]:
+    """Greedy word wrap measured in Helvetica glyph widths; overlong words are split"""
+    lines, line, width = [], "", 0.0
+    space = _text_width(" ")
+    for word in paragraph.split():
+        word_width = _text_width(word)
+        while word_width > TEXT_WIDTH:
+            if line:
+                lines.append(line)
+                line, width = "", 0.0
+            cut = len(word)
+            while cut > 1 and _text_width(word[:cut]) > TEXT_WIDTH:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+            word_width = _text_width(word)
+        if line and width + space + word_width <= TEXT_WIDTH:
+            line += " " + word
+            width += space + word_width
+        else:
+            if line:
+                lines.append(line)
+            line, width = word, word_width
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text: str) -> bytes:
+    """Encode a line as a PDF literal string in WinAnsiEncoding"""
+    raw = text.encode("cp1252", errors="replace")
+    raw = raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + raw + b")"
+
+
+def _pdf_lines(history: Iterable[Dict[str, str]], visitor_name: str,
+               generated: datetime, omitted: int) -> Iterator[Tuple[bool, str]]:
+    """Lay the transcript out as (bold, text) lines already wrapped to the page width"""
+    yield True, TITLE
+    yield False, f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}"
+    yield False, _pdf_text(f"Visitor: {visitor_name}")
+    if omitted:
+        yield True, _omitted_note(omitted)
+    yield False, ""
+    for label, content in _messages(history):
+        yield True, f"{label}:"
+        for paragraph in _pdf_text(content.replace("\r", "")).split("\n"):
+            for line in _wrap(paragraph) or [""]:
+                yield False, line
+        yield False, ""
+
+
+def _pdf_pages(lines: Iterator[Tuple[bool, str]]) -> Iterator[List[Tuple[bool, str]]]:
+    page = []
+    for line in lines:
+        page.append(line)
+        if len(page) == LINES_PER_PAGE:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _page_content(page: List[Tuple[bool, str]]) -> bytes:
+    parts = [b"BT", b"%d TL" % LEADING, b"%d %d Td" % (MARGIN, PAGE_HEIGHT - MARGIN)]
+    current = None
+    for bold, text in page:
+        if bold != current:
+            parts.append(b"/%s %d Tf" % (b"F2" if bold else b"F1", FONT_SIZE))
+            current = bold
+        parts.append(_pdf_string(text) + b" Tj T*")
+    parts.append(b"ET")
+    return b"\n".join(parts)
+
+
+def _chunked(items: Iterator[bytes], size: int = 512) -> Iterator[bytes]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield b"".join(batch)
+            batch = []
+    if batch:
+        yield b"".join(batch)
+
+
+def iter_pdf(history: Iterable[Dict[str, str]], visitor_name: str = "Guest",
+             generated: datetime = None, omitted: int = 0) -> Iterator[bytes]:
+    """Yield a PDF one page at a time; only an array of object offsets grows with length"""
+    generated = generated or datetime.now()
+    offsets = array("q", [0] * FIRST_PAGE_OBJ)  # indexed by object number
+    position = 0
+
+    def obj(number: int, body: bytes) -> bytes:
+        nonlocal position
+        if number < len(offsets):
+            offsets[number] = position
+        else:
+            offsets.append(position)
+        data = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        position += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position += len(header)
+    yield header + obj(
+        FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ) + obj(
+        BOLD_FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    )
+
+    number = FIRST_PAGE_OBJ
+    for page in _pdf_pages(_pdf_lines(history, visitor_name, generated, omitted)):
+        content = _page_content(page)
+        stream = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        page_dict = (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (PAGES_OBJ, PAGE_WIDTH, PAGE_HEIGHT, FONT_OBJ, BOLD_FONT_OBJ, number)
+        )
+        yield obj(number, stream) + obj(number + 1, page_dict)
+        number += 2
+
+    # Page objects are every second number after FIRST_PAGE_OBJ, so the Kids
+    # array and the xref table can both be streamed without keeping a list
+    page_count = (number - FIRST_PAGE_OBJ) // 2
+    offsets[PAGES_OBJ] = position
+    kids = _chunked(b"%d 0 R " % n for n in range(FIRST_PAGE_OBJ + 1, number, 2))
+    for chunk in chain(
+        [b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [" % (PAGES_OBJ, page_count)],
+        kids,
+        [b"] >>\nendobj\n"],
+    ):
+        position += len(chunk)
+        yield chunk
+    yield obj(CATALOG_OBJ, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_OBJ)
+
+    yield b"xref\n0 %d\n0000000000 65535 f \n" % number
+    yield from _chunked(b"%010d 00000 n \n" % offsets[n] for n in range(1, number))
+    yield b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        number, CATALOG_OBJ, position)
+
+
+EXPORT_FORMATS = {
+    "pdf": ("application/pdf", iter_pdf),
+    "txt": ("text/plain; charset=utf-8", iter_text),
+    "md": ("text/markdown; charset=utf-8", iter_markdown),
+}
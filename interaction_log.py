@@ -0,0 +1,290 @@
+"""
+Append-only interaction log for Rajath's AI Avatar.
+
+Request handlers call ``interaction_logger.record(...)``, which only enqueues a
+dict onto a bounded in-memory queue. A background thread drains the queue in
+batches, appends JSON lines to the log file and rotates it (gzip-compressed)
+once it grows past a size limit, so the request path never touches the disk.
+
+Run this module directly to aggregate the logs into hot-question and
+hot-company reports for cache pre-warming:
+
+    python interaction_log.py --top 20
+    python interaction_log.py --route /api/chat --json > hot.json
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+LOG_PATH = os.getenv("INTERACTION_LOG_PATH", "logs/interactions.jsonl")
+MAX_BYTES = int(os.getenv("INTERACTION_LOG_MAX_BYTES", 10 * 1024 * 1024))
+QUEUE_SIZE = int(os.getenv("INTERACTION_LOG_QUEUE_SIZE", 10000))
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 1.0  # seconds
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    if not text:
+        return ""
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text.rstrip("?!. ")
+
+
+def text_digest(text: Optional[str]) -> str:
+    """Short stable digest used to group long inputs such as job descriptions"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()[:12]
+
+
+def usage_fields(usage) -> dict:
+    """Extract token counts from an OpenAI ``usage`` object (may be None)"""
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cache_hit": False}
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": cached,
+        "cache_hit": cached > 0,
+    }
+
+
+class InteractionLogger:
+    """Buffered, append-only JSONL writer backed by a background thread"""
+
+    def __init__(self, path: str = LOG_PATH, max_bytes: int = MAX_BYTES,
+                 queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._dropped_reported = 0
+        self._dropped_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="interaction-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush everything still queued and stop the writer thread"""
+        if not self._thread:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def record(self, route: str, latency_ms: float, **fields):
+        """Enqueue one interaction record; never blocks the caller"""
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "route": route,
+            "latency_ms": round(latency_ms, 1),
+        }
+        entry.update(fields)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[dict] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Records lost to a full queue are reported in the log itself
+            dropped = self.dropped - self._dropped_reported
+            if dropped:
+                batch.append({
+                    "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                    "route": "_logger",
+                    "dropped": dropped,
+                })
+                self._dropped_reported += dropped
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"Could not write interaction log: {e}")
+
+    def _write(self, batch: List[dict]):
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+        if os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}-{stamp}{ext}"
+        os.replace(self.path, rotated)
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+
+
+interaction_logger = InteractionLogger()
+
+
+# --- Offline reporting ---
+
+def log_files(path: str = LOG_PATH) -> List[str]:
+    """The active log plus every rotated (gzipped) file next to it"""
+    directory = os.path.dirname(path) or "."
+    base = os.path.splitext(os.path.basename(path))[0]
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(base) and (name.endswith(".jsonl") or name.endswith(".jsonl.gz"))
+    )
+
+
+def read_records(paths: Iterable[str]) -> Iterator[dict]:
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def build_report(records: Iterable[dict], top: int = 10, route: Optional[str] = None) -> dict:
+    """Aggregate records into hot questions, companies and job descriptions"""
+    routes = Counter()
+    questions = Counter()
+    companies = Counter()
+    jobs = Counter()
+    tokens = defaultdict(int)
+    latency = defaultdict(float)
+    cache_hits = Counter()
+    errors = Counter()
+    prefetch_hits = Counter()
+    dropped = 0
+
+    for rec in records:
+        r = rec.get("route", "")
+        if r == "_logger":
+            dropped += rec.get("dropped", 0)
+            continue
+        if route and r != route:
+            continue
+        routes[r] += 1
+        latency[r] += rec.get("latency_ms", 0)
+        tokens[r] += rec.get("prompt_tokens", 0) + rec.get("completion_tokens", 0)
+        if rec.get("cache_hit"):
+            cache_hits[r] += 1
+        if rec.get("prefetch_hit"):
+            prefetch_hits[r] += 1
+        if rec.get("error") or rec.get("status", 200) >= 400:
+            errors[r] += 1
+        if r == "/api/prefetch":
+            continue  # speculative traffic, not something a visitor asked for
+        if rec.get("question"):
+            questions[rec["question"]] += 1
+        if rec.get("company") and rec["company"] != "unknown":
+            companies[rec["company"]] += 1
+        if rec.get("jd_hash"):
+            jobs[rec["jd_hash"]] += 1
+
+    return {
+        "routes": [
+            {
+                "route": r,
+                "requests": n,
+                "total_tokens": tokens[r],
+                "avg_latency_ms": round(latency[r] / n, 1),
+                "cache_hit_rate": round(cache_hits[r] / n, 3),
+                "prefetch_hit_rate": round(prefetch_hits[r] / n, 3),
+                "errors": errors[r],
+            }
+            for r, n in routes.most_common()
+        ],
+        "dropped_records": dropped,
+        "hot_questions": [{"question": q, "count": n} for q, n in questions.most_common(top)],
+        "hot_companies": [{"company": c, "count": n} for c, n in companies.most_common(top)],
+        "hot_job_descriptions": [{"jd_hash": h, "count": n} for h, n in jobs.most_common(top)],
+    }
+
+
+def print_report(report: dict):
+    print("Routes")
+    for row in report["routes"]:
+        print(f"  {row['route']:<28} {row['requests']:>7} req  {row['total_tokens']:>10} tok  "
+              f"{row['avg_latency_ms']:>8} ms  cache {row['cache_hit_rate']:.1%}  "
+              f"prefetch {row['prefetch_hit_rate']:.1%}  "
+              f"errors {row['errors']}")
+    if report["dropped_records"]:
+        print(f"  ({report['dropped_records']} records dropped by a full log queue)")
+    for title, key, field in (
+        ("Hot questions", "hot_questions", "question"),
+        ("Hot companies", "hot_companies", "company"),
+        ("Hot job descriptions", "hot_job_descriptions", "jd_hash"),
+    ):
+        print(f"\n{title}")
+        for row in report[key]:
+            print(f"  {row['count']:>7}  {row[field]}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Aggregate interaction logs for cache pre-warming")
+    parser.add_argument("paths", nargs="*", help="log files to read (default: active and rotated logs)")
+    parser.add_argument("--top", type=int, default=10, help="entries per hot list")
+    parser.add_argument("--route", help="only include this route, e.g. /api/chat")
+    parser.add_argument("--json", action="store_true", help="emit the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or log_files()
+    if not paths:
+        print(f"No interaction logs found at {LOG_PATH}", file=sys.stderr)
+        return 1
+    report = build_report(read_records(paths), top=args.top, route=args.route)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Speculative prefetch of answers for the follow-up suggestion chips.
+
+After each answer the browser posts the suggestions it is showing and the
+server generates their answers in the background at low priority. When the
+visitor clicks one, ``/api/chat`` claims the prefetched answer instead of
+making a cold OpenAI round trip, provided it is ready or already generating
+and done within ``PREFETCH_CLAIM_TIMEOUT``; otherwise the click takes the
+normal streaming path. Any other prefetch for that session is
+cancelled (or, if already finished, counted as wasted) as soon as the next
+message arrives.
+
+Prefetching is bounded several ways: only the server's known follow-up
+questions are accepted, a global concurrency limit applies, tokens are
+reserved against a per-session budget and a global hourly cap before a
+request starts, and finished answers have a short TTL.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from interaction_log import normalize_text, usage_fields
+
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", 4))
+PREFETCH_MAX_SUGGESTIONS = int(os.getenv("PREFETCH_MAX_SUGGESTIONS", 3))
+PREFETCH_TOKEN_BUDGET = int(os.getenv("PREFETCH_TOKEN_BUDGET", 20000))  # per session
+PREFETCH_GLOBAL_TOKENS_PER_HOUR = int(os.getenv("PREFETCH_GLOBAL_TOKENS_PER_HOUR", 300000))
+# Reserved for the answer until the real usage is known
+PREFETCH_COMPLETION_ESTIMATE = int(os.getenv("PREFETCH_COMPLETION_ESTIMATE", 500))
+PREFETCH_TTL = int(os.getenv("PREFETCH_TTL", 300))  # seconds
+# How long a click waits for a prefetch that is already generating
+PREFETCH_CLAIM_TIMEOUT = float(os.getenv("PREFETCH_CLAIM_TIMEOUT", 1.0))  # seconds
+
+# Takes chat messages, returns (answer, OpenAI usage)
+Completion = Callable[[List[dict]], Awaitable[Tuple[str, object]]]
+
+
+@dataclass
+class PrefetchEntry:
+    history_len: int
+    prompt_estimate: int  # tokens billed for the prompt even if the answer is cancelled
+    state: "SessionPrefetch"
+    reserved: int = 0  # tokens currently counted against the budgets for this entry
+    task: Optional[asyncio.Task] = None
+    started: bool = False  # request sent to OpenAI (holds a concurrency slot)
+    created: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class SessionPrefetch:
+    entries: Dict[str, PrefetchEntry] = field(default_factory=dict)
+    tokens_spent: int = 0
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class PrefetchManager:
+    """Per-session cache of speculatively generated answers"""
+
+    def __init__(self, complete: Completion, concurrency: int = PREFETCH_CONCURRENCY,
+                 max_suggestions: int = PREFETCH_MAX_SUGGESTIONS,
+                 token_budget: int = PREFETCH_TOKEN_BUDGET, ttl: int = PREFETCH_TTL,
+                 claim_timeout: float = PREFETCH_CLAIM_TIMEOUT,
+                 global_budget: int = PREFETCH_GLOBAL_TOKENS_PER_HOUR,
+                 allowed: Optional[Iterable[str]] = None):
+        self._complete = complete
+        self._concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.max_suggestions = max_suggestions
+        self.token_budget = token_budget
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+        self.global_budget = global_budget
+        # Only these suggestions may be prefetched; None allows any (for tests)
+        self.allowed = {normalize_text(q) for q in allowed} if allowed is not None else None
+        self._window_start = time.monotonic()
+        self._window_tokens = 0
+        self._sessions: Dict[str, SessionPrefetch] = {}
+        self._stats = {
+            "requested": 0,
+            "scheduled": 0,
+            "rejected": 0,
+            "skipped_budget": 0,
+            "skipped_global_budget": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "cancelled_in_flight": 0,
+            "hits": 0,
+            "misses": 0,
+            "late": 0,
+            "used_tokens": 0,
+            "wasted_tokens": 0,
+        }
+
+    def schedule(self, session_id: str, history_len: int,
+                 prompts: Dict[str, List[dict]]) -> int:
+        """Start prefetching ``{suggestion: messages}``; returns how many were scheduled"""
+        self._expire()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        state = self._sessions.setdefault(session_id, SessionPrefetch())
+        state.last_seen = time.monotonic()
+
+        # Suggestions from an older turn are useless once the conversation moved on
+        for key in [k for k, e in state.entries.items() if e.history_len != history_len]:
+            self._discard(state.entries.pop(key))
+
+        scheduled = 0
+        for suggestion, messages in list(prompts.items())[: self.max_suggestions]:
+            self._stats["requested"] += 1
+            key = normalize_text(suggestion)
+            if not key or (self.allowed is not None and key not in self.allowed):
+                self._stats["rejected"] += 1
+                continue
+            if key in state.entries:
+                continue
+            entry = PrefetchEntry(history_len, _estimate_tokens(messages), state)
+            if not self._reserve(entry, entry.prompt_estimate + PREFETCH_COMPLETION_ESTIMATE):
+                continue
+            entry.task = asyncio.create_task(self._run(entry, messages))
+            state.entries[key] = entry
+            self._stats["scheduled"] += 1
+            scheduled += 1
+        return scheduled
+
+    async def claim(self, session_id: str, message: str,
+                    history_len: int) -> Optional[Tuple[str, object]]:
+        """Take the prefetched answer for ``message`` and drop every other one"""
+        state = self._sessions.get(session_id)
+        if state is None or not state.entries:
+            return None
+        entry = state.entries.pop(normalize_text(message), None)
+        self.cancel_session(session_id)
+
+        if (entry is None or entry.history_len != history_len
+                or time.monotonic() - entry.created > self.ttl):
+            if entry is not None:
+                self._discard(entry)
+            self._stats["misses"] += 1
+            return None
+
+        # A queued prefetch, or one that won't finish soon, would be slower than
+        # the normal streaming path, which shows the first tokens almost at once
+        if not entry.task.done():
+            if not entry.started:
+                self._discard(entry)
+                self._stats["late"] += 1
+                self._stats["misses"] += 1
+                return None
+            try:
+                await asyncio.wait_for(asyncio.shield(entry.task), self.claim_timeout)
+            except asyncio.TimeoutError:
+                self._discard(entry)
+                self._stats["late"] += 1
+                self._stats["misses"] += 1
+                return None
+            except asyncio.CancelledError:
+                if not entry.task.cancelled():
+                    self._discard(entry)
+                    raise  # the request itself was cancelled
+        if entry.task.cancelled():
+            # shutdown() cancelled it while we were waiting
+            self._stats["misses"] += 1
+            return None
+
+        result = entry.task.result()
+        if result is None:
+            self._stats["misses"] += 1
+            return None
+        answer, usage = result
+        self._stats["hits"] += 1
+        self._stats["used_tokens"] += _total_tokens(usage)
+        return answer, usage
+
+    def cancel_session(self, session_id: str):
+        state = self._sessions.get(session_id)
+        if state is None:
+            return
+        for entry in state.entries.values():
+            self._discard(entry)
+        state.entries.clear()
+
+    def shutdown(self):
+        for session_id in list(self._sessions):
+            self.cancel_session(session_id)
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        resolved = stats["hits"] + stats["misses"]
+        spent = stats["used_tokens"] + stats["wasted_tokens"]
+        stats["hit_rate"] = round(stats["hits"] / resolved, 3) if resolved else 0.0
+        stats["waste_ratio"] = round(stats["wasted_tokens"] / spent, 3) if spent else 0.0
+        stats["in_flight"] = sum(
+            1 for s in self._sessions.values() for e in s.entries.values() if not e.task.done()
+        )
+        stats["sessions"] = len(self._sessions)
+        stats["global_tokens_this_hour"] = self._window_tokens
+        return stats
+
+    def _reserve(self, entry: PrefetchEntry, amount: int) -> bool:
+        """Count a prefetch against both budgets before it starts, so in-flight work can't overshoot"""
+        now = time.monotonic()
+        if now - self._window_start >= 3600:
+            self._window_start, self._window_tokens = now, 0
+        if entry.state.tokens_spent + amount > self.token_budget:
+            self._stats["skipped_budget"] += 1
+            return False
+        if self._window_tokens + amount > self.global_budget:
+            self._stats["skipped_global_budget"] += 1
+            return False
+        self._settle(entry, amount)
+        return True
+
+    def _settle(self, entry: PrefetchEntry, tokens: int):
+        """Replace the entry's reservation with ``tokens`` (actual or estimated cost)"""
+        delta = tokens - entry.reserved
+        entry.state.tokens_spent += delta
+        self._window_tokens = max(0, self._window_tokens + delta)
+        entry.reserved = tokens
+
+    async def _run(self, entry: PrefetchEntry,
+                   messages: List[dict]) -> Optional[Tuple[str, object]]:
+        try:
+            async with self._semaphore:
+                entry.started = True
+                answer, usage = await self._complete(messages)
+        except Exception as e:
+            print(f"Prefetch failed: {e}")
+            self._stats["failed"] += 1
+            self._settle(entry, entry.prompt_estimate if entry.started else 0)
+            return None
+        self._settle(entry, _total_tokens(usage))
+        self._stats["completed"] += 1
+        return answer, usage
+
+    def _discard(self, entry: PrefetchEntry):
+        """Cancel an unclaimed prefetch and book the tokens it already cost as wasted"""
+        if not entry.task.done():
+            entry.task.cancel()
+            self._stats["cancelled"] += 1
+            if entry.started:
+                # The prompt was already sent and billed; only the answer is saved
+                self._stats["cancelled_in_flight"] += 1
+                self._stats["wasted_tokens"] += entry.prompt_estimate
+                self._settle(entry, entry.prompt_estimate)
+            else:
+                self._settle(entry, 0)
+        elif not entry.task.cancelled() and entry.task.result() is not None:
+            self._stats["wasted_tokens"] += _total_tokens(entry.task.result()[1])
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id, state in list(self._sessions.items()):
+            for key in [k for k, e in state.entries.items()
+                        if e.task.done() and now - e.created > self.ttl]:
+                self._discard(state.entries.pop(key))
+            if not state.entries and now - state.last_seen > self.ttl:
+                del self._sessions[session_id]
+
+
+def _estimate_tokens(messages: List[dict]) -> int:
+    """Rough prompt size (about four characters per token) for cancelled requests"""
+    return sum(len(m.get("content") or "") for m in messages) // 4
+
+
+def _total_tokens(usage) -> int:
+    fields = usage_fields(usage)
+    return fields["prompt_tokens"] + fields["completion_tokens"]
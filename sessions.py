@@ -0,0 +1,89 @@
+"""
+In-memory conversation sessions for Rajath's AI Avatar.
+
+The browser sends a ``session_id`` with every chat request and the server keeps
+the resulting transcript here, so exports (and other per-session features) do
+not need the whole history re-uploaded. Sessions are evicted least-recently-used
+once ``MAX_SESSIONS`` is reached and expire after ``SESSION_TTL`` seconds idle.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 1000))
+MAX_MESSAGES_PER_SESSION = int(os.getenv("MAX_MESSAGES_PER_SESSION", 500))
+SESSION_TTL = int(os.getenv("SESSION_TTL", 6 * 60 * 60))  # seconds
+
+
+@dataclass
+class Session:
+    session_id: str
+    visitor_name: str = "Guest"
+    visitor_company: str = "Unknown"
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    omitted: int = 0  # oldest messages dropped to stay under MAX_MESSAGES_PER_SESSION
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class SessionStore:
+    """Thread-safe LRU of conversation sessions"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS,
+                 max_messages: int = MAX_MESSAGES_PER_SESSION, ttl: int = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.monotonic() - session.last_seen > self.ttl:
+                del self._sessions[session_id]
+                return None
+            session.last_seen = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: str, visitor_name: str = "Guest",
+                      visitor_company: str = "Unknown") -> Session:
+        session = self.get(session_id)
+        with self._lock:
+            if session is None:
+                session = Session(session_id, visitor_name, visitor_company)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                session.visitor_name = visitor_name
+                session.visitor_company = visitor_company
+            return session
+
+    def append(self, session_id: str, role: str, content: str,
+               visitor_name: str = "Guest", visitor_company: str = "Unknown",
+               message_id: Optional[str] = None):
+        session = self.get_or_create(session_id, visitor_name, visitor_company)
+        with self._lock:
+            session.messages.append({"role": role, "content": content, "id": message_id})
+            if len(session.messages) > self.max_messages:
+                excess = len(session.messages) - self.max_messages
+                del session.messages[:excess]
+                session.omitted += excess
+
+    def snapshot(self, session_id: str) -> Optional[Session]:
+        """Copy of a session whose message list is safe to iterate while chats continue"""
+        session = self.get(session_id)
+        if session is None:
+            return None
+        with self._lock:
+            return Session(session.session_id, session.visitor_name, session.visitor_company,
+                           list(session.messages), session.omitted, session.last_seen)
+
+
+session_store = SessionStore()
@@ -2,6 +2,7 @@
 let visitorName = "Guest";
 let visitorCompany = "Unknown";
 let chatHistory = [];
+let sessionId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : `s_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
 let recognition = null;
 let isListening = false;
 let isDarkMode = localStorage.getItem('darkMode') === 'true';
@@ -269,14 +270,19 @@ async function sendMessage() {
     
     if (!message) return;
     
-    // Clear input
+    // Clear input and any follow-up chips from the previous answer
     input.value = '';
+    clearFollowUpSuggestions();
     
     // Add user message to UI
     const userMessageId = addMessageToChat('user', message);
     
     // Add to history with messageId
-    chatHistory.push({ role: 'user', content: message, messageId: userMessageId, timestamp: Date.now() });
+    const userEntry = { role: 'user', content: message, messageId: userMessageId, timestamp: Date.now() };
+    chatHistory.push(userEntry);
+    
+    // Generated up front so the server can store the turn under the ids the client uses
+    const responseId = `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
     
     // Show typing indicator (non-blocking)
     showTypingIndicator();
@@ -291,7 +297,10 @@ async function sendMessage() {
                 message: message,
                 history: chatHistory,
                 visitor_name: visitorName,
-                visitor_company: visitorCompany
+                visitor_company: visitorCompany,
+                session_id: sessionId,
+                message_id: userMessageId,
+                response_id: responseId
             })
         });
         
@@ -299,7 +308,7 @@ async function sendMessage() {
         hideTypingIndicator();
         
         // Create message container for streaming
-        const messageId = `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+        const messageId = responseId;
         const timestamp = Date.now();
         messageTimestamps[messageId] = timestamp;
         
@@ -366,7 +375,10 @@ async function sendMessage() {
                                 // Add reaction buttons
                                 setTimeout(() => addReactionButtons(messageId), 500);
                                 // Add to history with messageId and timestamp
-                                chatHistory.push({ role: 'assistant', content: cleanedResponse, messageId: messageId, timestamp: timestamp });
+                                // The server stored both sides of the turn before sending 'done'
+                                userEntry.stored = true;
+                                chatHistory.push({ role: 'assistant', content: cleanedResponse, messageId: messageId, timestamp: timestamp, stored: true });
+                                showFollowUpSuggestions();
                                 // Auto-speak if TTS enabled
                                 if (textToSpeechEnabled && 'speechSynthesis' in window) {
                                     setTimeout(() => speakText(cleanedResponse), 500);
@@ -619,7 +631,7 @@ What would you like to know? Feel free to ask me anything! 💬`;
     const welcomeId = addMessageToChat('assistant', welcomeMsg);
     
     // Add to history with messageId
-    chatHistory.push({ role: 'assistant', content: welcomeMsg, messageId: welcomeId, timestamp: Date.now() });
+    chatHistory.push({ role: 'assistant', content: welcomeMsg, messageId: welcomeId, timestamp: Date.now(), welcome: true });
 }
 
 // Scroll to chat section
@@ -753,25 +765,52 @@ function updateSettingsDarkModeButton() {
     }
 }
 
-// Export Chat as PDF
-async function exportChatPDF() {
+// The stored session matches only if every message went through the server and none was edited
+function canExportFromSession() {
+    return chatHistory.every(m => m.welcome || (m.stored && !editedMessages[m.messageId]));
+}
+
+// Export Chat as PDF, text or markdown (streamed by the server, from the stored session when possible)
+async function exportChatFromServer(format) {
     try {
-        const response = await fetch('/api/export-chat-pdf', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                history: chatHistory,
-                visitor_name: visitorName
-            })
-        });
+        let response = null;
+        if (canExportFromSession()) {
+            response = await fetch('/api/export-chat', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    session_id: sessionId,
+                    message_ids: chatHistory.filter(m => m.stored).map(m => m.messageId),
+                    visitor_name: visitorName,
+                    format: format
+                })
+            });
+        }
+        
+        // Edited, deleted, expired or evicted - upload the history instead
+        if (!response || response.status === 404 || response.status === 409) {
+            response = await fetch('/api/export-chat', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    history: chatHistory,
+                    visitor_name: visitorName,
+                    format: format
+                })
+            });
+        }
+        
+        if (!response.ok) throw new Error(`Export failed: ${response.status}`);
         
         const blob = await response.blob();
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
         a.href = url;
-        a.download = `conversation_${new Date().toISOString().split('T')[0]}.txt`;
+        a.download = `conversation_${new Date().toISOString().split('T')[0]}.${format}`;
         document.body.appendChild(a);
         a.click();
         window.URL.revokeObjectURL(url);
@@ -1139,26 +1178,72 @@ function hideSuggestions() {
     }
 }
 
+// Also the server's prefetch allowlist (FOLLOW_UP_QUESTIONS in app.py); keep both in sync
+const COMMON_QUESTIONS = [
+    'What is your experience with Django?',
+    'Tell me about your AI projects.',
+    'Where did you study?',
+    'How would you approach building a scalable API?',
+    'What are your strongest technical skills?',
+    'Tell me about your work experience.',
+    'What programming languages do you know?',
+    'Describe your Python projects.',
+    'What is your experience with machine learning?',
+    'Tell me about your education background.'
+];
+
 function getSuggestions(input) {
-    const commonQuestions = [
-        'What is your experience with Django?',
-        'Tell me about your AI projects.',
-        'Where did you study?',
-        'How would you approach building a scalable API?',
-        'What are your strongest technical skills?',
-        'Tell me about your work experience.',
-        'What programming languages do you know?',
-        'Describe your Python projects.',
-        'What is your experience with machine learning?',
-        'Tell me about your education background.'
-    ];
-    
     const lowerInput = input.toLowerCase();
-    return commonQuestions
+    return COMMON_QUESTIONS
         .filter(q => q.toLowerCase().includes(lowerInput))
         .slice(0, 5);
 }
 
+// Follow-up chips shown after each answer; the server prefetches their answers
+function showFollowUpSuggestions() {
+    if (!smartSuggestionsEnabled) return;
+    
+    const asked = new Set(chatHistory.filter(m => m.role === 'user').map(m => m.content.toLowerCase()));
+    const followUps = COMMON_QUESTIONS.filter(q => !asked.has(q.toLowerCase())).slice(0, 3);
+    if (followUps.length === 0) return;
+    
+    const chatMessages = document.getElementById('chatMessages');
+    const container = document.createElement('div');
+    container.id = 'followUpSuggestions';
+    container.className = 'example-queries follow-up-suggestions fade-in';
+    followUps.forEach(question => {
+        const chip = document.createElement('button');
+        chip.className = 'example-btn';
+        chip.textContent = question;
+        chip.onclick = () => sendExample(question);
+        container.appendChild(chip);
+    });
+    chatMessages.appendChild(container);
+    scrollToBottom();
+    
+    // Low-priority: failures only mean the click falls back to a normal request
+    fetch('/api/prefetch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            session_id: sessionId,
+            suggestions: followUps,
+            history: chatHistory,
+            visitor_name: visitorName,
+            visitor_company: visitorCompany
+        })
+    }).catch(error => console.warn('Prefetch skipped:', error));
+}
+
+function clearFollowUpSuggestions() {
+    const container = document.getElementById('followUpSuggestions');
+    if (container) {
+        container.remove();
+    }
+}
+
 // 6. Optimized Streaming (batch updates)
 let streamingBuffer = '';
 let streamingUpdateTimeout = null;
@@ -1531,36 +1616,17 @@ function showExportMenu() {
 }
 
 function exportChat(format) {
+    // PDF, text and markdown are rendered by the server's streaming exporter
+    if (format === 'pdf' || format === 'txt' || format === 'md') {
+        exportChatFromServer(format);
+        showExportMenu(); // Close menu
+        return;
+    }
+    
     let content = '';
     const timestamp = new Date().toISOString().split('T')[0];
     
-    if (format === 'txt') {
-        content = `Rajath's AI Avatar - Conversation Export\n`;
-        content += `Generated: ${new Date().toLocaleString()}\n`;
-        content += `Visitor: ${visitorName} | Company: ${visitorCompany}\n`;
-        content += `${'='.repeat(60)}\n\n`;
-        
-        chatHistory.forEach(msg => {
-            const role = msg.role === 'user' ? 'You' : "Rajath's AI Avatar";
-            const time = msg.timestamp ? formatTimestamp(msg.timestamp) : '';
-            content += `[${role}]${time ? ' (' + time + ')' : ''}:\n${msg.content}\n\n`;
-        });
-        
-        downloadFile(content, `conversation_${timestamp}.txt`, 'text/plain');
-    } else if (format === 'md') {
-        content = `# Rajath's AI Avatar - Conversation\n\n`;
-        content += `**Generated:** ${new Date().toLocaleString()}\n`;
-        content += `**Visitor:** ${visitorName} | **Company:** ${visitorCompany}\n\n`;
-        content += `---\n\n`;
-        
-        chatHistory.forEach(msg => {
-            const role = msg.role === 'user' ? '**You**' : "**Rajath's AI Avatar**";
-            const time = msg.timestamp ? ` *(${formatTimestamp(msg.timestamp)})*` : '';
-            content += `${role}${time}:\n\n${msg.content}\n\n---\n\n`;
-        });
-        
-        downloadFile(content, `conversation_${timestamp}.md`, 'text/markdown');
-    } else if (format === 'html') {
+    if (format === 'html') {
         content = `<!DOCTYPE html>
 <html>
 <head>